@@ -1,7 +1,67 @@
+import html
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse, parse_qs
-from bs4 import BeautifulSoup
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library json module is used without it
+    orjson = None
+
+# Shared session so every Azure DevOps call reuses pooled TCP/TLS connections
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    # Back off exponentially on throttling and transient server errors, honouring Retry-After
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods={'GET', 'POST'},
+        respect_retry_after_header=True,
+        raise_on_status=False  # Hand the last response back so the callers can report it
+    )
+))
+SESSION.headers.update({'Content-Type': 'application/json', 'Accept': 'application/json'})
+
+# Number of work item batches fetched concurrently per hierarchy level
+MAX_WORKERS = 16
+
+# Maximum number of work items the workitemsbatch endpoint accepts per request
+BATCH_SIZE = 200
+
+# Reference names of the searched fields in the standard Azure Boards process templates
+CANONICAL_FIELDS = {
+    'ReproSteps': 'Microsoft.VSTS.TCM.ReproSteps',
+    'Steps': 'Microsoft.VSTS.TCM.Steps',
+    'AcceptanceCriteria': 'Microsoft.VSTS.Common.AcceptanceCriteria'
+}
+
+# Matches a run of adjacent HTML tags or comments, which is replaced by a single separator space. A tag must start
+# with a letter, '/', '!' or '?', and quoted attribute values may contain '>', so a bare '<' in text is kept.
+_TAG_RE = re.compile(r'''(?:<!--.*?-->|<[A-Za-z/!?](?:"[^"]*"|'[^']*'|[^'">])*>)+''', re.DOTALL)
+
+@dataclass
+class CrawlState:
+    """State shared by every level of a single work item crawl."""
+    visited_ids: set = field(default_factory=set)  # Work items already visited
+    work_item_map: dict = field(default_factory=dict)  # Cleaned description of each work item
+    hierarchy: defaultdict = field(default_factory=lambda: defaultdict(dict))  # Parent -> ordered set of children
+    fetched_work_items: dict = field(default_factory=dict)  # Cache of fetched work item JSON
+
+def parse_json(response):
+    """Decode the response body with orjson when it is installed, otherwise with the standard library."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 def remove_trailing_slash(input_string):
     """Remove trailing slash if present, otherwise leave the string unchanged."""
@@ -14,10 +74,11 @@ def is_valid_azure_boards_url(epic_link):
         return True
     return False
 
-def validate_pat_access(organization_url, pat):
-    """Validate if the provided PAT token can access the Azure DevOps organization."""
-    url = f"{organization_url}/_apis/projects?api-version=7.0"
-    response = requests.get(url, auth=HTTPBasicAuth('', pat))
+def validate_pat_access(organization_url):
+    """Validate if the session's PAT token can access the Azure DevOps organization."""
+    # A single project is enough to prove access; avoid listing every project in the organization
+    url = f"{organization_url}/_apis/projects?$top=1&api-version=7.0"
+    response = SESSION.get(url)
     
     if response.status_code == 200:
         return True
@@ -48,41 +109,37 @@ def extract_organization_from_epic_link(epic_link):
     except IndexError:
         return None
 
-def get_projects(organization_url, pat):
-    """Fetch all projects from the Azure DevOps organization."""
-    url = f"{organization_url}/_apis/projects?api-version=7.0"
-    response = requests.get(url, auth=HTTPBasicAuth('', pat))
-    
+def get_work_items_batch(organization_url, work_item_ids):
+    """Retrieve JSON data (including relations) for up to BATCH_SIZE work items in a single request."""
+    url = f"{organization_url}/_apis/wit/workitemsbatch?api-version=7.0"
+    payload = {
+        'ids': [int(work_item_id) for work_item_id in work_item_ids],
+        '$expand': 'Relations',
+        'errorPolicy': 'Omit'  # Return null for inaccessible work items instead of failing the batch
+    }
+    response = SESSION.post(url, json=payload)
+
     if response.status_code == 200:
-        projects = response.json()['value']
-        return [project['name'] for project in projects]
+        return [work_item for work_item in parse_json(response)['value'] if work_item]
     else:
-        print(f"Failed to fetch projects: {response.status_code} - {response.text}")
+        print(f"Failed to fetch work items {', '.join(work_item_ids)}: {response.status_code} - {response.text}")
         return []
 
-def get_json_of_workItem_using_azureDevops_restApis(url, pat, fetched_work_items, work_item_id):
-    """Retrieve JSON data for a specific work item, and cache the result to avoid repeated API hits."""
-    # Check if the work item has already been fetched
-    if work_item_id in fetched_work_items:
-        return fetched_work_items[work_item_id]
-
-    response = requests.get(url, auth=HTTPBasicAuth('', pat))
-    if response.status_code == 200:
-        data = response.json()
-        fetched_work_items[work_item_id] = data  # Cache the result
-        return data
-    return None
-
 def clean_html(raw_html):
     """Remove HTML tags from the raw HTML string."""
-    soup = BeautifulSoup(raw_html, "html.parser")
-    soup = soup.get_text(separator=" ").strip()
-    return soup  # Get text with spaces between elements
+    text = _TAG_RE.sub(" ", raw_html)  # Keep spaces between elements
+    return html.unescape(text).strip()
 
 def find_key_containing(fields, search_term):
-    """Find the first key in fields that contains the search term."""
+    """Find the canonical field for the search term, falling back to the first key that contains it."""
+    canonical_key = CANONICAL_FIELDS.get(search_term)
+    if canonical_key in fields:
+        return fields[canonical_key]
+
+    # Custom process templates may use their own reference names, so scan as a fallback
+    search_term = search_term.lower()
     for key, value in fields.items():
-        if search_term.lower() in key.lower():
+        if search_term in key.lower():
             return value
     return None
 
@@ -102,94 +159,76 @@ def collect_work_item_descriptions(work_item_map, hierarchy, work_item_id=None,
             result += collect_work_item_descriptions(work_item_map, hierarchy, child_item, level + 1)
     return result
 
-def collect_work_item_descriptions_and_hierarchy(projects, organization_url, work_item_id, pat, visited_ids=None, work_item_map=None, hierarchy=None, fetched_work_items=None):
-    """Recursively collect work item descriptions and build a parent-child hierarchy tree."""
-    if visited_ids is None:
-        visited_ids = set()  # Initialize the set to keep track of visited work items
-    if work_item_map is None:
-        work_item_map = {}  # Initialize the map to store work item descriptions
-    if fetched_work_items is None:
-        fetched_work_items = {}  # Initialize the cache to store fetched work items
-    if hierarchy is None:
-        hierarchy = {}  # Initialize the hierarchy tree
-
-    # If the work item has already been visited, skip re-fetching it
-    if work_item_id in visited_ids:
-        return work_item_map, hierarchy
-
-    # Mark the current work item as visited
-    visited_ids.add(work_item_id)
-
-    for project in projects:
-        url = f"{organization_url}/{project}/_apis/wit/workitems/{work_item_id}?$expand=relations&api-version=7.0"
-        data_json = get_json_of_workItem_using_azureDevops_restApis(url, pat, fetched_work_items, work_item_id)
-        
-        if data_json:
-            # Extract and store the description of the current work item
-            fields = data_json.get('fields', {})
-            type = fields.get('System.WorkItemType', 'No type available')
-
-            if type == 'Bug':
-                # Dynamically search for a field containing 'ReproSteps'
-                description = "Repro Steps: " + (find_key_containing(fields, 'ReproSteps') or 'No Repro Steps available')
-            elif type == 'Test Case':
-                # Dynamically search for a field containing 'Steps'
-                description = "Steps: " + (find_key_containing(fields, 'Steps') or 'No Steps available')
-            else:
-                # For other types, get the general description
-                description = "Description: " + (fields.get('System.Description', 'No description available'))
-                
-                # Dynamically search for Acceptance Criteria field
-                acceptance_criteria = find_key_containing(fields, 'AcceptanceCriteria')
-                if acceptance_criteria:
-                    description += '\nAcceptance Criteria: ' + acceptance_criteria
-
-            cleaned_description = clean_html(description).strip()
-            work_item_map[work_item_id] = cleaned_description
-
-            # Process related work items via 'relations'
-            relations = data_json.get('relations', [])
-            related_work_item_ids = []
-            parent_work_item = None
-            
-            for relation in relations:
-                if relation.get('rel') == 'System.LinkTypes.Hierarchy-Forward':  # Child of the current work item
-                    relation_url = relation.get('url', '')
-                    related_work_item_id = relation_url.split('/')[-1]
-                    if related_work_item_id.isdigit() and related_work_item_id not in visited_ids:
-                        related_work_item_ids.append(related_work_item_id)
-                elif relation.get('rel') == 'System.LinkTypes.Hierarchy-Reverse':  # Parent of the current work item
-                    parent_work_item = relation.get('url', '').split('/')[-1]
-
-            # Add the current work item to the hierarchy
-            if parent_work_item:
-                if work_item_id not in hierarchy.get(parent_work_item, []):
-                    hierarchy.setdefault(parent_work_item, []).append(work_item_id)
-            else:
-                if work_item_id not in hierarchy.get(None, []):  # Top-level work item
-                    hierarchy.setdefault(None, []).append(work_item_id)
-
-            # Recursively fetch descriptions of related (child) work items
-            for related_id in related_work_item_ids:
-                collect_work_item_descriptions_and_hierarchy(
-                    projects, organization_url, related_id, pat, visited_ids, work_item_map, hierarchy, fetched_work_items
-                )
-
-    return work_item_map, hierarchy
-
-def print_hierarchy(hierarchy, work_item_map, work_item_id=None, level=0):
-    """Print the hierarchy tree with descriptions."""
-    indent = "  " * level
-    if work_item_id is None:
-        # Print top-level items (those without a parent)
-        for top_level_item in hierarchy.get(None, []):
-            print(f"{indent}Work Item ID: {top_level_item}\n{work_item_map.get(top_level_item, '')}\n")
-            print_hierarchy(hierarchy, work_item_map, top_level_item, level + 1)
+def describe_work_item(fields):
+    """Build the cleaned description of a work item based on its type."""
+    type = fields.get('System.WorkItemType', 'No type available')
+
+    if type == 'Bug':
+        # Dynamically search for a field containing 'ReproSteps'
+        description = "Repro Steps: " + (find_key_containing(fields, 'ReproSteps') or 'No Repro Steps available')
+    elif type == 'Test Case':
+        # Dynamically search for a field containing 'Steps'
+        description = "Steps: " + (find_key_containing(fields, 'Steps') or 'No Steps available')
     else:
-        # Print child items
-        for child_item in hierarchy.get(work_item_id, []):
-            print(f"{indent}Work Item ID: {child_item}\n{work_item_map.get(child_item, '')}\n")
-            print_hierarchy(hierarchy, work_item_map, child_item, level + 1)
+        # For other types, get the general description
+        description = "Description: " + (fields.get('System.Description', 'No description available'))
+
+        # Dynamically search for Acceptance Criteria field
+        acceptance_criteria = find_key_containing(fields, 'AcceptanceCriteria')
+        if acceptance_criteria:
+            description += '\nAcceptance Criteria: ' + acceptance_criteria
+
+    return clean_html(description).strip()
+
+def collect_work_item_descriptions_and_hierarchy(organization_url, work_item_id, state=None):
+    """Collect work item descriptions and build a parent-child hierarchy tree, batch-fetching each level."""
+    if state is None:
+        state = CrawlState()
+
+    fetch_batch = partial(get_work_items_batch, organization_url)
+    frontier = [work_item_id]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while frontier:
+            # Skip work items that have already been visited and mark the rest as visited
+            level_ids = [item_id for item_id in dict.fromkeys(frontier) if item_id not in state.visited_ids]
+            state.visited_ids.update(level_ids)
+            frontier = []
+
+            # Fetch the uncached part of the level in batches, then process the results in order
+            missing_ids = [item_id for item_id in level_ids if item_id not in state.fetched_work_items]
+            batches = [missing_ids[i:i + BATCH_SIZE] for i in range(0, len(missing_ids), BATCH_SIZE)]
+            for work_items in executor.map(fetch_batch, batches):
+                for work_item in work_items:
+                    state.fetched_work_items[str(work_item['id'])] = work_item  # Cache the result
+
+            for current_id in level_ids:
+                data_json = state.fetched_work_items.get(current_id)
+                if not data_json:
+                    continue
+
+                # Extract and store the description of the current work item
+                state.work_item_map[current_id] = describe_work_item(data_json.get('fields', {}))
+
+                # Process related work items via 'relations'
+                relations = data_json.get('relations', [])
+                parent_work_item = None
+
+                for relation in relations:
+                    if relation.get('rel') == 'System.LinkTypes.Hierarchy-Forward':  # Child of the current work item
+                        relation_url = relation.get('url', '')
+                        related_work_item_id = relation_url.split('/')[-1]
+                        if related_work_item_id.isdigit() and related_work_item_id not in state.visited_ids:
+                            frontier.append(related_work_item_id)
+                    elif relation.get('rel') == 'System.LinkTypes.Hierarchy-Reverse':  # Parent of the current work item
+                        parent_work_item = relation.get('url', '').split('/')[-1]
+
+                # Add the current work item to the hierarchy (top-level work items are stored under None)
+                state.hierarchy[parent_work_item or None][current_id] = None
+
+    # Children are kept as dict keys for O(1) de-duplication in insertion order; expose them as lists
+    hierarchy = {parent: list(children) for parent, children in state.hierarchy.items()}
+    return state.work_item_map, hierarchy
 
 def main():
     epic_link = input("Enter the Azure Boards epic link: ").strip()
@@ -218,18 +257,15 @@ def main():
     # Construct the organization URL
     organization_url = f"https://dev.azure.com/{organization_name}"
 
-    # Validate PAT token
-    if not validate_pat_access(organization_url, pat):
-        return
+    # Authenticate every request made through the shared session
+    SESSION.auth = HTTPBasicAuth('', pat)
 
-    # Fetch all projects
-    projects = get_projects(organization_url, pat)
-    if not projects:
-        print("No projects found.")
+    # Validate PAT token
+    if not validate_pat_access(organization_url):
         return
 
     # Collect work item descriptions and hierarchy
-    work_item_map, hierarchy = collect_work_item_descriptions_and_hierarchy(projects, organization_url, epic_id, pat)
+    work_item_map, hierarchy = collect_work_item_descriptions_and_hierarchy(organization_url, epic_id)
 
     result = collect_work_item_descriptions(work_item_map, hierarchy)
     
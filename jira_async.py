@@ -0,0 +1,225 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from jira_ticket_hierarchy import (
+    SEARCH_PAGE_SIZE, TICKET_FIELDS, bucket_child_issues, loads_json, record_level, reuse_unchanged_tickets,
+    store_ticket, stored_ticket_records, summarize_ticket, take_unvisited
+)
+
+# Maximum number of Jira requests in flight at once, to stay within Jira's rate limits
+CONCURRENCY = 32
+
+# Maximum number of pooled connections to Jira
+CONNECTION_LIMIT = 64
+
+# Retry policy for throttling and transient server errors, matching the urllib3 Retry on the requests session
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Seconds to wait before the given retry, honouring a Retry-After header in seconds or as an HTTP date
+def retry_delay(headers, attempt):
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return BACKOFF_FACTOR * 2 ** attempt
+
+
+async def get_json(session, semaphore, url, params=None, payload=None):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                # A payload turns the request into a POST, as used by the JQL search endpoint
+                request = session.get(url, params=params) if payload is None else session.post(url, json=payload)
+                async with request as response:
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = retry_delay(response.headers, attempt)
+                    else:
+                        try:
+                            return response.status, loads_json(await response.read())
+                        except json.JSONDecodeError:
+                            print(f"Failed to parse response from {url}: Status Code {response.status}, Response Text: {await response.text()}")
+                            return response.status, None
+        except aiohttp.ClientConnectionError:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = BACKOFF_FACTOR * 2 ** attempt
+
+        # Back off outside the semaphore so other requests keep going meanwhile
+        await asyncio.sleep(delay)
+
+
+async def fetch_ticket(session, semaphore, ticket_key, jira_base_url, state):
+    with state.lock:
+        if ticket_key in state.ticket_cache:
+            return state.ticket_cache[ticket_key]
+
+    jira_api_url = f"{jira_base_url}/rest/api/2/issue/{ticket_key}"
+    status, ticket_data = await get_json(session, semaphore, jira_api_url, {'fields': ','.join(TICKET_FIELDS)})
+    if ticket_data is None:
+        return None
+    if status != 200:
+        print(f"Failed to retrieve data for ticket {ticket_key}: {status} - {ticket_data.get('errorMessages', 'Unknown error')}")
+        return None
+
+    ticket_info = summarize_ticket(ticket_key, ticket_data)
+    store_ticket(ticket_info, jira_base_url, state)
+    return ticket_info
+
+
+async def fetch_child_issues(session, semaphore, parent_key, jira_base_url):
+    search_url = f"{jira_base_url}/rest/api/3/search"
+    child_issues = []
+    start_at = 0
+
+    while True:
+        params = {'jql': f'"Parent Link"={parent_key}', 'fields': '*none', 'maxResults': SEARCH_PAGE_SIZE, 'startAt': start_at}
+        status, search_results = await get_json(session, semaphore, search_url, params)
+        if search_results is None:
+            return []
+        if status != 200:
+            print(f"Failed to fetch child issues for {parent_key}: {status} - {search_results.get('errorMessages', 'Unknown error')}")
+            return []
+
+        # Extract child issue keys from search results
+        page = search_results.get('issues', [])
+        child_issues.extend(issue['key'] for issue in page)
+        start_at += len(page)
+        if not page or start_at >= search_results.get('total', 0):
+            return child_issues
+
+
+async def search_tickets(session, semaphore, jql, jira_base_url, fields=TICKET_FIELDS):
+    search_url = f"{jira_base_url}/rest/api/2/search"
+    issues = []
+    start_at = 0
+
+    while True:
+        payload = {
+            'jql': jql,
+            'fields': fields,
+            'maxResults': SEARCH_PAGE_SIZE,
+            'startAt': start_at,
+            'validateQuery': 'warn'
+        }
+        status, search_results = await get_json(session, semaphore, search_url, payload=payload)
+        if search_results is None:
+            return None
+        if status != 200:
+            print(f"Failed to search tickets: {status} - {search_results.get('errorMessages', 'Unknown error')}")
+            return None
+
+        page = search_results.get('issues', [])
+        issues.extend(page)
+        start_at += len(page)
+        if not page or start_at >= search_results.get('total', 0):
+            return issues
+
+
+# Async counterpart of start_child_issue_searches and finish_child_issue_searches in jira_ticket_hierarchy
+async def fetch_child_issues_bulk(session, semaphore, parent_keys, jira_base_url):
+    chunks = [parent_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(parent_keys), SEARCH_PAGE_SIZE)]
+    results = await asyncio.gather(*(
+        search_tickets(session, semaphore, f'"Parent Link" in ({",".join(chunk)})', jira_base_url, fields=['parent'])
+        for chunk in chunks
+    ))
+
+    child_issues = {}
+    fallback_keys = []
+    for chunk, issues in zip(chunks, results):
+        buckets = bucket_child_issues(chunk, issues)
+        if buckets is None:
+            fallback_keys.extend(chunk)
+        else:
+            child_issues.update(buckets)
+
+    children = await asyncio.gather(*(fetch_child_issues(session, semaphore, key, jira_base_url) for key in fallback_keys))
+    child_issues.update(zip(fallback_keys, children))
+    return child_issues
+
+
+# Async counterpart of jira_ticket_hierarchy.get_tickets_bulk
+async def fetch_tickets_bulk(session, semaphore, ticket_keys, jira_base_url):
+    bulk_url = f"{jira_base_url}/rest/api/2/issue/bulkfetch"
+    payload = {'issueIdsOrKeys': ticket_keys, 'fields': TICKET_FIELDS}
+    status, bulk_results = await get_json(session, semaphore, bulk_url, payload=payload)
+    if status == 200 and bulk_results is not None:
+        return bulk_results.get('issues', [])
+    return await search_tickets(session, semaphore, f"key in ({','.join(ticket_keys)})", jira_base_url)
+
+
+# Async counterpart of jira_ticket_hierarchy.load_unchanged_tickets
+async def load_unchanged_tickets(session, semaphore, ticket_keys, jira_base_url, state):
+    stored = stored_ticket_records(ticket_keys, jira_base_url, state)
+    stored_keys = list(stored)
+    chunks = [stored_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(stored_keys), SEARCH_PAGE_SIZE)]
+
+    results = await asyncio.gather(*(
+        search_tickets(session, semaphore, f"key in ({','.join(chunk)})", jira_base_url, fields=['updated'])
+        for chunk in chunks
+    ))
+    unchanged = set()
+    for issues in results:
+        unchanged |= reuse_unchanged_tickets(stored, issues, jira_base_url, state)
+
+    return [key for key in ticket_keys if key not in unchanged]
+
+
+# Async counterpart of jira_ticket_hierarchy.prefetch_tickets
+async def prefetch_tickets(session, semaphore, ticket_keys, jira_base_url, state):
+    with state.lock:
+        missing_keys = [key for key in ticket_keys if key not in state.ticket_cache]
+    missing_keys = await load_unchanged_tickets(session, semaphore, missing_keys, jira_base_url, state)
+    chunks = [missing_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(missing_keys), SEARCH_PAGE_SIZE)]
+
+    results = await asyncio.gather(*(
+        fetch_tickets_bulk(session, semaphore, chunk, jira_base_url) for chunk in chunks
+    ))
+    for issues in results:
+        for issue in issues or []:
+            store_ticket(summarize_ticket(issue['key'], issue), jira_base_url, state)
+
+
+async def collect_async(ticket_key, jira_base_url, email, api_token, state, parent_ticket=None):
+    collected_tickets_info = []
+    frontier = [(ticket_key, parent_ticket)]
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT)
+
+    async with aiohttp.ClientSession(
+        auth=aiohttp.BasicAuth(email, api_token),
+        connector=connector,
+        headers={'Accept': 'application/json'}
+    ) as session:
+        while frontier:
+            level = take_unvisited(frontier, state)
+
+            # Look up the level's tickets and child issues with batched searches, running both concurrently;
+            # tickets the search skipped are then fetched one by one
+            level_keys = [key for key, _ in level]
+            children_by_parent, _ = await asyncio.gather(
+                fetch_child_issues_bulk(session, semaphore, level_keys, jira_base_url),
+                prefetch_tickets(session, semaphore, level_keys, jira_base_url, state)
+            )
+            level_data = await asyncio.gather(*(fetch_ticket(session, semaphore, key, jira_base_url, state) for key in level_keys))
+            level_children = [children_by_parent[key] for key in level_keys]
+
+            frontier = record_level(level, level_data, level_children, state, collected_tickets_info)
+
+    return collected_tickets_info
+
+
+# Synchronous entry point with the same result as jira_ticket_hierarchy.collect_ticket_information
+def collect_ticket_information_async(ticket_key, jira_base_url, email, api_token, state, parent_ticket=None):
+    return asyncio.run(collect_async(ticket_key, jira_base_url, email, api_token, state, parent_ticket))
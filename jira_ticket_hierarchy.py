@@ -1,73 +1,295 @@
+import base64
+import dbm
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 import requests
-from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from urllib3.util.retry import Retry
 import json
 import re
+import sys
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library json module is used without it
+    orjson = None
+
+# Shared session so every Jira call reuses pooled TCP/TLS connections
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    # Back off exponentially on throttling and transient server errors, honouring Retry-After
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods={'GET', 'POST'},
+        respect_retry_after_header=True,
+        raise_on_status=False  # Hand the last response back so the callers can report it
+    )
+)
+# Self-hosted Jira may be served over plain http, which needs the same pooling and retries
+SESSION.mount('https://', _ADAPTER)
+SESSION.mount('http://', _ADAPTER)
+# json= sets Content-Type on POSTs and requests already sends Accept-Encoding: gzip, so only Accept is needed here
+SESSION.headers.update({'Accept': 'application/json'})
+
+# Number of tickets fetched concurrently per hierarchy level
+MAX_WORKERS = 16
+
+# Only the issue fields read by collect_ticket_information are requested from Jira
+TICKET_FIELDS = ['summary', 'description', 'status', 'customfield_10000', 'comment', 'issuelinks', 'updated']
+
+# Maximum number of issues returned by a single Jira search request
+SEARCH_PAGE_SIZE = 100
+
+# Maximum number of ticket payloads kept in memory during a crawl
+TICKET_CACHE_SIZE = 4096
+
+# Maximum number of ticket records kept between runs; the least recently stored ones are dropped beyond that
+DISK_CACHE_SIZE = 10000
+
+# Ticket records not stored or revalidated for this many seconds are dropped when the cache is opened
+DISK_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# Errors from a missing, locked or corrupt cache file; the cache is optional, so they only cause misses. dbm.dumb, the
+# only backend on Windows, parses its index with ast.literal_eval, so a truncated index raises SyntaxError.
+_DISK_CACHE_ERRORS = (OSError, ValueError, SyntaxError) + dbm.error
+
+# Jira issue URL, capturing the base URL and the ticket key
+_JIRA_URL_RE = re.compile(r'(https?://[^\s/]+)(/browse/([A-Z]+-\d+))')
+
+# Any HTML tag
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class PrecomputedBasicAuth(AuthBase):
+    # Basic auth whose header is encoded once, the way requests' HTTPBasicAuth encodes it (latin-1), instead of on
+    # every request. Being set as the session's auth, it also keeps requests from falling back to ~/.netrc.
+    def __init__(self, username, password):
+        credentials = base64.b64encode(f"{username}:{password}".encode('latin1')).decode('ascii')
+        self.header = f"Basic {credentials}"
+
+    def __call__(self, request):
+        request.headers['Authorization'] = self.header
+        return request
+
+
+class LRUCache(OrderedDict):
+    # Dictionary that evicts the least recently used entry once it holds more than maxsize entries
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class DiskCache:
+    # Ticket records and their ETags kept between runs. Records are stored as JSON rather than pickled, so a
+    # tampered file can at worst produce a cache miss, and any failure to read or write one is treated as a miss.
+    def __init__(self, path, flag='c'):
+        self.path = path
+        self.db = dbm.open(path, flag)
+
+    @classmethod
+    def open(cls, path):
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        except OSError as e:
+            print(f"Ticket cache at {path} is unavailable, continuing without it: {e}")
+            return None
+
+        # A file left corrupt by a killed or concurrent run is replaced by an empty one; if even that fails (for
+        # example because the file is locked or read-only), the crawl continues without a cache
+        for flag in ('c', 'n'):
+            cache = None
+            try:
+                cache = cls(path, flag)
+                cache.prune()
+                return cache
+            except Exception as e:  # The dbm backends can fail on a damaged file with almost any exception
+                if cache is not None:
+                    cache.close()
+                print(f"Ticket cache at {path} is unusable ({e!r}), {'starting a new one' if flag == 'c' else 'continuing without it'}")
+        return None
 
-# Cache to store ticket details to avoid hitting the same ticket multiple times
-ticket_cache = {}
+    def get(self, key):
+        try:
+            value = self.db.get(key)
+            record = json.loads(value) if value is not None else None
+        except _DISK_CACHE_ERRORS:
+            return None
+        if isinstance(record, dict) and isinstance(record.get('ticket'), dict) and 'etag' in record:
+            return record
+        return None
 
-# Set to track visited tickets and avoid infinite recursion
-visited_tickets = set()
+    def __setitem__(self, key, record):
+        # Every write, including re-storing a revalidated record, refreshes the record's age
+        try:
+            self.db[key] = json.dumps({**record, 'stored': time.time()})
+        except _DISK_CACHE_ERRORS:
+            pass
 
-# Dictionary to hold the hierarchy flowchart in JSON format
-ticket_hierarchy = {}
+    def prune(self):
+        # Keep the most recently stored records that are younger than DISK_CACHE_MAX_AGE, at most DISK_CACHE_SIZE
+        oldest = time.time() - DISK_CACHE_MAX_AGE
+        records = []
+        for key in self.db.keys():
+            record = self.get(key)
+            stored = record.get('stored') if record else None
+            if isinstance(stored, (int, float)) and stored >= oldest:
+                records.append((stored, key, record))
 
-def validate_jira_credentials(jira_base_url, email, api_token):
-    jira_api_url = f"{jira_base_url}/rest/api/2/myself"
-    response = requests.get(
-        jira_api_url,
-        auth=HTTPBasicAuth(email, api_token),
-        headers={'Content-Type': 'application/json'}
-    )
+        if len(records) == len(self.db) and len(records) <= DISK_CACHE_SIZE:
+            return
 
-    try:
-        response_data = response.json()
+        # Rewrite the kept records into a new file, since deleting keys does not shrink every dbm backend
+        records.sort(key=lambda entry: entry[0], reverse=True)
+        self.db.close()
+        self.db = dbm.open(self.path, 'n')
+        for _, key, record in records[:DISK_CACHE_SIZE]:
+            self.db[key] = json.dumps(record)
+
+    def close(self):
+        try:
+            self.db.close()
+        except Exception:  # Closing a damaged or already closed file must not stop the tool either
+            pass
+
+
+# Per-user location of the ticket cache, so it neither depends on nor trusts the directory the script is run from
+def disk_cache_path():
+    cache_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'jira_ticket_hierarchy', 'tickets')
 
-        if response.status_code == 200:
-            return True
-        else:
-            print(f"Invalid Jira credentials: {response.status_code} - {response_data.get('errorMessages', 'Unknown error')}") 
-            return False
-    except requests.exceptions.JSONDecodeError:
-        print(f"Invalid response from Jira when validating credentials. Status Code: {response.status_code}, Response Text: {response.text}")
-        return False
+
+@dataclass
+class CrawlState:
+    # Cache to store ticket details to avoid hitting the same ticket multiple times
+    ticket_cache: LRUCache = field(default_factory=lambda: LRUCache(TICKET_CACHE_SIZE))
+
+    # Set to track visited tickets and avoid revisiting them
+    visited_tickets: set = field(default_factory=set)
+
+    # Dictionary to hold the hierarchy flowchart in JSON format
+    ticket_hierarchy: dict = field(default_factory=dict)
+
+    # Optional persistent cache of ticket records and their ETags, shared across runs and revalidated against
+    # the ticket's ETag or 'updated' timestamp
+    disk_cache: DiskCache = None
+
+    # Guards the ticket caches, which are written from worker threads
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def loads_json(data):
+    # Decode raw JSON bytes with orjson when it is installed, otherwise with the standard library; both raise a
+    # json.JSONDecodeError on invalid input
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_json(response):
+    return loads_json(response.content)
 
 
 def check_html_content(data):
-    stripped_data = data.strip()
-    if data.strip().startswith('<!DOCTYPE html>') or re.search(r'<[^>]+>', stripped_data):
+    stripped_data = data.lstrip()
+    # An HTML error page starts with a tag, so anything else is returned without scanning it
+    if not stripped_data.startswith('<'):
+        return str(data)
+    # Error pages are recognised from their doctype or html prefix before falling back to a tag scan
+    prefix = stripped_data[:9].lower()
+    if prefix == '<!doctype' or prefix.startswith('<html') or _HTML_TAG_RE.search(stripped_data):
         return 'The site may be unavailable or the URL is incorrect.'
     else:
         return str(data)
 
 
-def validate_jira_ticket_access(ticket_key, jira_base_url, email, api_token):
+# Key of a ticket's record in the disk cache
+def disk_cache_key(ticket_key, jira_base_url):
+    return f"{jira_base_url}/browse/{ticket_key}"
+
+
+# Put a freshly fetched ticket record into the memory cache and, when there is one, the disk cache
+def store_ticket(ticket_info, jira_base_url, state, etag=None):
+    with state.lock:
+        state.ticket_cache[ticket_info['key']] = ticket_info
+        if state.disk_cache is not None:
+            state.disk_cache[disk_cache_key(ticket_info['key'], jira_base_url)] = {'etag': etag, 'ticket': ticket_info}
+
+
+# Request a ticket, revalidating the record stored by a previous run with If-None-Match. Returns the response and, when
+# Jira answered 304 Not Modified, the stored ticket record, which is then loaded into the cache.
+def request_ticket(ticket_key, jira_base_url, state):
     jira_api_url = f"{jira_base_url}/rest/api/2/issue/{ticket_key}"
-    response = requests.get(
-        jira_api_url,
-        auth=HTTPBasicAuth(email, api_token),
-        headers={'Content-Type': 'application/json'}
-    )
+    disk_key = disk_cache_key(ticket_key, jira_base_url)
+
+    cached = None
+    if state.disk_cache is not None:
+        with state.lock:
+            cached = state.disk_cache.get(disk_key)
+    headers = {'If-None-Match': cached['etag']} if cached and cached['etag'] else {}
+
+    response = SESSION.get(jira_api_url, params={'fields': ','.join(TICKET_FIELDS)}, headers=headers)
+
+    if response.status_code == 304:
+        with state.lock:
+            state.ticket_cache[ticket_key] = cached['ticket']
+            state.disk_cache[disk_key] = cached
+        return response, cached['ticket']
+    return response, None
+
+
+# Validates the credentials and the access to the ticket in one request, returning the ticket record on success
+def validate_jira_ticket_access(ticket_key, jira_base_url, state):
+    # A 304 for a ticket stored by a previous run proves access as well as a full response would
+    response, cached_ticket = request_ticket(ticket_key, jira_base_url, state)
+    if cached_ticket is not None:
+        return cached_ticket
 
     try:
-        response_data = response.json()
+        response_data = parse_json(response)
 
         if response.status_code == 200:
             if jira_base_url not in response_data.get('self', ''):
                 print(f"The ticket {ticket_key} does not belong to the Jira base URL: {jira_base_url}")
-                return False
-            return True
+                return None
+
+            # Seed the crawl with the ticket so it is not fetched a second time
+            ticket_info = summarize_ticket(ticket_key, response_data)
+            store_ticket(ticket_info, jira_base_url, state, etag=response.headers.get('ETag'))
+            return ticket_info
+        elif response.status_code == 401:
+            print(f"Invalid Jira credentials: {response.status_code} - {response_data.get('errorMessages', 'Unknown error')}")
+            return None
         else:
             print(f"Access denied to ticket {ticket_key}: {response.status_code} - {response_data.get('errorMessages', 'Unknown error')}")
-            return False
-    except requests.exceptions.JSONDecodeError:
+            return None
+    except json.JSONDecodeError:
         print(f"Invalid response from Jira when validating ticket access. Status Code: {response.status_code}, Response Text: {response.text}")
-        return False
+        return None
 
 
 def extract_ticket_key_and_base_url(jira_url):
     # Check if the URL matches the Jira issue URL format
-    match = re.search(r'(https?://[^\s/]+)(/browse/([A-Z]+-\d+))', jira_url)
+    match = _JIRA_URL_RE.search(jira_url)
     if match:
         base_url = match.group(1)
         ticket_key = match.group(3)
@@ -77,125 +299,327 @@ def extract_ticket_key_and_base_url(jira_url):
         return None, None
 
 
-def get_ticket_data(ticket_key, jira_base_url, email, api_token):
-    if ticket_key in ticket_cache:
-        return ticket_cache[ticket_key]
+# Reduce an issue payload to the values used by the report so the full JSON is not kept in the cache
+def summarize_ticket(ticket_key, ticket_data):
+    fields = ticket_data['fields']
 
-    jira_api_url = f"{jira_base_url}/rest/api/2/issue/{ticket_key}"
+    # Extracting the relevant fields from the ticket
+    ticket_info = {
+        'key': ticket_key,
+        'summary': fields.get('summary', 'No summary available'),
+        'description': fields.get('description', 'No description available'),
+        'status': (fields.get('status') or {}).get('name', 'No status available'),
+        # Replace 'customfield_10000' with the actual custom field ID for acceptance criteria if necessary
+        'acceptance_criteria': fields.get('customfield_10000', 'No acceptance criteria available'),
+        # Last modification time, used to tell whether a record in the disk cache is still current
+        'updated': fields.get('updated')
+    }
+
+    # Extracting and storing comments if they exist, as a tuple since the record is only read afterwards
+    comments = (fields.get('comment') or {}).get('comments', ())
+    ticket_info['comments'] = tuple(comment['body'] for comment in comments)
+
+    # Keeping only the keys of linked issues, which are needed to build the hierarchy
+    linked_issues = []
 
-    response = requests.get(
-        jira_api_url,
-        auth=HTTPBasicAuth(email, api_token),
-        headers={'Content-Type': 'application/json'}
-    )
+    for link in fields.get('issuelinks', ()):
+        linked_issue = link.get('inwardIssue') or link.get('outwardIssue')
+        if linked_issue:
+            linked_issues.append(linked_issue['key'])
+
+    ticket_info['linked_issues'] = linked_issues
+    return ticket_info
+
+
+def get_ticket_data(ticket_key, jira_base_url, state):
+    with state.lock:
+        if ticket_key in state.ticket_cache:
+            return state.ticket_cache[ticket_key]
+
+    # Revalidate a ticket stored by a previous run instead of downloading it again
+    response, cached_ticket = request_ticket(ticket_key, jira_base_url, state)
+    if cached_ticket is not None:
+        return cached_ticket
 
     try:
-        ticket_data = response.json()
-        ticket_cache[ticket_key] = ticket_data
-        return ticket_data
-    except requests.exceptions.JSONDecodeError:
+        ticket_data = parse_json(response)
+        if response.status_code != 200:
+            print(f"Failed to retrieve data for ticket {ticket_key}: {response.status_code} - {ticket_data.get('errorMessages', 'Unknown error')}")
+            return None
+
+        ticket_info = summarize_ticket(ticket_key, ticket_data)
+        store_ticket(ticket_info, jira_base_url, state, etag=response.headers.get('ETag'))
+        return ticket_info
+    except json.JSONDecodeError:
         print(f"Failed to retrieve data for ticket {ticket_key}: Status Code {response.status_code}, Response Text: {response.text}")
         return None
 
 
 # New function to fetch child issues using the provided endpoint
-def get_child_issues(parent_key, jira_base_url, email, api_token):
-    search_url = f'{jira_base_url}/rest/api/3/search?jql="Parent Link"={parent_key}'
-
-    response = requests.get(
-        search_url,
-        auth=HTTPBasicAuth(email, api_token),
-        headers={'Content-Type': 'application/json'}
-    )
+def get_child_issues(parent_key, jira_base_url):
+    search_url = f"{jira_base_url}/rest/api/3/search"
+    child_issues = []
+    start_at = 0
+
+    while True:
+        # Only the issue keys are needed, which Jira returns even when no fields are requested
+        params = {'jql': f'"Parent Link"={parent_key}', 'fields': '*none', 'maxResults': SEARCH_PAGE_SIZE, 'startAt': start_at}
+        response = SESSION.get(search_url, params=params)
+
+        try:
+            search_results = parse_json(response)
+            if response.status_code != 200:
+                print(f"Failed to fetch child issues for {parent_key}: {response.status_code} - {search_results.get('errorMessages', 'Unknown error')}")
+                return []
+        except json.JSONDecodeError:
+            print(f"Failed to parse response for child issues: Status Code {response.status_code}, Response Text: {response.text}")
+            return []
 
-    try:
-        search_results = response.json()
-        if response.status_code == 200:
-            # Extract child issue keys from search results
-            child_issues = [issue['key'] for issue in search_results.get('issues', [])]
+        # Extract child issue keys from search results
+        page = search_results.get('issues', [])
+        child_issues.extend(issue['key'] for issue in page)
+        start_at += len(page)
+        if not page or start_at >= search_results.get('total', 0):
             return child_issues
+
+
+# Run a paginated JQL search and return every matching issue, or None if the search failed
+def search_tickets(jql, jira_base_url, fields=TICKET_FIELDS):
+    search_url = f"{jira_base_url}/rest/api/2/search"
+    issues = []
+    start_at = 0
+
+    while True:
+        # POST keeps long "key in (...)" queries out of the URL
+        payload = {
+            'jql': jql,
+            'fields': fields,
+            'maxResults': SEARCH_PAGE_SIZE,
+            'startAt': start_at,
+            'validateQuery': 'warn'  # Unknown or inaccessible keys are skipped instead of failing the search
+        }
+        response = SESSION.post(search_url, json=payload)
+
+        try:
+            search_results = parse_json(response)
+            if response.status_code != 200:
+                print(f"Failed to search tickets: {response.status_code} - {search_results.get('errorMessages', 'Unknown error')}")
+                return None
+        except json.JSONDecodeError:
+            print(f"Failed to parse response for ticket search: Status Code {response.status_code}, Response Text: {response.text}")
+            return None
+
+        page = search_results.get('issues', [])
+        issues.extend(page)
+        start_at += len(page)
+        if not page or start_at >= search_results.get('total', 0):
+            return issues
+
+
+# Bucket the issues returned by a "Parent Link" search under the parent named in their 'parent' field, or return None
+# if the search failed or a child cannot be attributed that way
+def bucket_child_issues(parent_keys, issues):
+    if issues is None:
+        return None
+
+    buckets = {parent_key: [] for parent_key in parent_keys}
+    for issue in issues:
+        parent_key = ((issue.get('fields') or {}).get('parent') or {}).get('key')
+        if parent_key not in buckets:
+            return None
+        buckets[parent_key].append(issue['key'])
+    return buckets
+
+
+# Start one "Parent Link" search per SEARCH_PAGE_SIZE parents on the executor, so they run alongside the ticket fetches
+def start_child_issue_searches(parent_keys, jira_base_url, executor):
+    searches = []
+    for i in range(0, len(parent_keys), SEARCH_PAGE_SIZE):
+        chunk = parent_keys[i:i + SEARCH_PAGE_SIZE]
+        jql = f'"Parent Link" in ({",".join(chunk)})'
+        searches.append((chunk, executor.submit(search_tickets, jql, jira_base_url, fields=['parent'])))
+    return searches
+
+
+# Wait for the searches started by start_child_issue_searches and return the child issues of every parent; the parents
+# of chunks the bulk search could not attribute are searched one by one, concurrently on the executor
+def finish_child_issue_searches(searches, jira_base_url, executor):
+    child_issues = {}
+    fallback_keys = []
+
+    for chunk, future in searches:
+        buckets = bucket_child_issues(chunk, future.result())
+        if buckets is None:
+            fallback_keys.extend(chunk)
         else:
-            print(f"Failed to fetch child issues for {parent_key}: {response.status_code} - {search_results.get('errorMessages', 'Unknown error')}")
-            return []
-    except requests.exceptions.JSONDecodeError:
-        print(f"Failed to parse response for child issues: Status Code {response.status_code}, Response Text: {response.text}")
-        return []
+            child_issues.update(buckets)
+
+    child_issues.update(fetch_many(lambda key: get_child_issues(key, jira_base_url), fallback_keys, executor))
+    return child_issues
 
 
-def collect_ticket_information(ticket_key, jira_base_url, email, api_token, parent_ticket=None):
-    if ticket_key in visited_tickets:
-        return []
+# Fetch up to SEARCH_PAGE_SIZE issues with one bulkfetch call, falling back to a "key in (...)" search on Jira
+# versions without that endpoint
+def get_tickets_bulk(ticket_keys, jira_base_url):
+    bulk_url = f"{jira_base_url}/rest/api/2/issue/bulkfetch"
+    response = SESSION.post(bulk_url, json={'issueIdsOrKeys': ticket_keys, 'fields': TICKET_FIELDS})
 
-    visited_tickets.add(ticket_key)
+    if response.status_code == 200:
+        try:
+            # Unknown or inaccessible keys are reported under 'issueErrors' and left to the per-ticket fetch
+            return parse_json(response).get('issues', [])
+        except json.JSONDecodeError:
+            pass
+    return search_tickets(f"key in ({','.join(ticket_keys)})", jira_base_url)
 
-    ticket_data = get_ticket_data(ticket_key, jira_base_url, email, api_token)
-    if not ticket_data:
-        return []
 
-    ticket_info = {'key': ticket_key}
+# Disk cache records of the given tickets that carry an 'updated' timestamp to compare with Jira's
+def stored_ticket_records(ticket_keys, jira_base_url, state):
+    if state.disk_cache is None:
+        return {}
+
+    with state.lock:
+        records = {key: state.disk_cache.get(disk_cache_key(key, jira_base_url)) for key in ticket_keys}
+    return {key: record for key, record in records.items() if record and record['ticket'].get('updated')}
+
 
-    # Extracting the relevant fields from the ticket
-    ticket_info['summary'] = ticket_data['fields'].get('summary', 'No summary available')
-    ticket_info['description'] = ticket_data['fields'].get('description', 'No description available')
-    ticket_info['status'] = ticket_data['fields'].get('status', {}).get('name', 'No status available')
+# Load the stored records whose 'updated' timestamp matches the one returned by Jira into the cache, refreshing their
+# age on disk, and return the keys that were reused
+def reuse_unchanged_tickets(stored, issues, jira_base_url, state):
+    unchanged = set()
+    for issue in issues or []:
+        record = stored.get(issue['key'])
+        if record and (issue.get('fields') or {}).get('updated') == record['ticket']['updated']:
+            unchanged.add(issue['key'])
+            with state.lock:
+                state.ticket_cache[issue['key']] = record['ticket']
+                state.disk_cache[disk_cache_key(issue['key'], jira_base_url)] = record
+    return unchanged
 
-    # Replace 'customfield_10000' with the actual custom field ID for acceptance criteria if necessary
-    ticket_info['acceptance_criteria'] = ticket_data['fields'].get('customfield_10000', 'No acceptance criteria available')
 
-    # Extracting and storing comments if they exist
-    comments = ticket_data['fields'].get('comment', {}).get('comments', [])
-    ticket_info['comments'] = [comment['body'] for comment in comments] if comments else []
+# Load tickets stored by a previous run into the cache when Jira reports the same 'updated' timestamp, checking
+# SEARCH_PAGE_SIZE keys per search that returns only that field. Returns the keys that still need fetching.
+def load_unchanged_tickets(ticket_keys, jira_base_url, state, executor):
+    stored = stored_ticket_records(ticket_keys, jira_base_url, state)
+    stored_keys = list(stored)
+    chunks = [stored_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(stored_keys), SEARCH_PAGE_SIZE)]
 
-    # Processing linked issues to build the hierarchy
-    issue_links = ticket_data['fields'].get('issuelinks', [])
-    linked_issues = []
+    unchanged = set()
+    for issues in executor.map(lambda chunk: search_tickets(f"key in ({','.join(chunk)})", jira_base_url, fields=['updated']), chunks):
+        unchanged |= reuse_unchanged_tickets(stored, issues, jira_base_url, state)
+
+    return [key for key in ticket_keys if key not in unchanged]
+
+
+# Load uncached tickets into the cache with one bulk request per SEARCH_PAGE_SIZE keys instead of one GET per ticket
+def prefetch_tickets(ticket_keys, jira_base_url, state, executor):
+    with state.lock:
+        missing_keys = [key for key in ticket_keys if key not in state.ticket_cache]
+    missing_keys = load_unchanged_tickets(missing_keys, jira_base_url, state, executor)
+    chunks = [missing_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(missing_keys), SEARCH_PAGE_SIZE)]
+
+    for issues in executor.map(lambda chunk: get_tickets_bulk(chunk, jira_base_url), chunks):
+        for issue in issues or []:
+            store_ticket(summarize_ticket(issue['key'], issue), jira_base_url, state)
+
+
+# Run fetch(key) for every key on the executor and return the results keyed by ticket key
+def fetch_many(fetch, keys, executor):
+    futures = {executor.submit(fetch, key): key for key in keys}
+    return {futures[future]: future.result() for future in as_completed(futures)}
+
+
+# Keep only tickets that have not been visited yet, one entry per ticket, and mark them as visited
+def take_unvisited(frontier, state):
+    level = []
+    for key, parent in frontier:
+        if key not in state.visited_tickets:
+            state.visited_tickets.add(key)
+            level.append((key, parent))
+    return level
 
-    for link in issue_links:
-        if 'inwardIssue' in link:
-            linked_issue_key = link['inwardIssue']['key']
-            if linked_issue_key != parent_ticket:  # Avoid circular reference to the parent ticket
-                linked_issues.append(linked_issue_key)
-        elif 'outwardIssue' in link:
-            linked_issue_key = link['outwardIssue']['key']
-            if linked_issue_key != parent_ticket:
-                linked_issues.append(linked_issue_key)
-
-    # Fetching child issues using the new endpoint
-    child_issues = get_child_issues(ticket_key, jira_base_url, email, api_token)
-
-    # Adding linked and child tickets to the hierarchy
-    if linked_issues or child_issues:
-        ticket_hierarchy[ticket_key] = linked_issues + child_issues
-
-    # Recursively collect information for linked and child tickets
-    linked_and_child_tickets_info = []
-    for linked_issue_key in linked_issues + child_issues:
-        linked_and_child_tickets_info.extend(
-            collect_ticket_information(linked_issue_key, jira_base_url, email, api_token, parent_ticket=ticket_key)
-        )
 
-    return [ticket_info] + linked_and_child_tickets_info
+# Record the fetched tickets of a level in the hierarchy and return the frontier of the next level
+def record_level(level, level_data, level_children, state, collected_tickets_info):
+    frontier = []
+    for (key, parent), ticket_info, child_issues in zip(level, level_data, level_children):
+        if not ticket_info:
+            continue
+
+        collected_tickets_info.append(ticket_info)
+
+        # Merge linked and child tickets in order, listing a ticket that is both only once
+        related_issues = dict.fromkeys(ticket_info['linked_issues'])
+        related_issues.update(dict.fromkeys(child_issues))
+        # Avoid circular reference to the parent ticket
+        related_issues.pop(parent, None)
+
+        # Adding linked and child tickets to the hierarchy
+        if related_issues:
+            state.ticket_hierarchy[key] = list(related_issues)
+
+        # Queue linked and child tickets for the next level
+        frontier.extend((related_issue_key, key) for related_issue_key in related_issues)
+    return frontier
+
+
+def collect_ticket_information(ticket_key, jira_base_url, state, parent_ticket=None, workers=MAX_WORKERS):
+    collected_tickets_info = []
+    frontier = [(ticket_key, parent_ticket)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while frontier:
+            level = take_unvisited(frontier, state)
+
+            # Look up the child issues of the whole level in the background while the level's ticket data is loaded
+            # through batched searches; tickets the searches did not return are fetched individually
+            level_keys = [key for key, _ in level]
+            child_searches = start_child_issue_searches(level_keys, jira_base_url, executor)
+            prefetch_tickets(level_keys, jira_base_url, state, executor)
+            tickets = fetch_many(lambda key: get_ticket_data(key, jira_base_url, state), level_keys, executor)
+            level_data = [tickets[key] for key in level_keys]
+            child_issues = finish_child_issue_searches(child_searches, jira_base_url, executor)
+            level_children = [child_issues[key] for key in level_keys]
+
+            frontier = record_level(level, level_data, level_children, state, collected_tickets_info)
+
+    return collected_tickets_info
 
 
 def display_ticket_hierarchy(ticket_hierarchy):
     print("Hierarchy Flowchart (JSON format):")
-    print(json.dumps(ticket_hierarchy, indent=4))
+    if orjson is None:
+        # Same two-space layout as orjson's OPT_INDENT_2, so the output does not depend on the optional package
+        print(json.dumps(ticket_hierarchy, indent=2, ensure_ascii=False))
+        return
+
+    hierarchy_json = orjson.dumps(ticket_hierarchy, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    stdout_buffer = getattr(sys.stdout, 'buffer', None)
+    if stdout_buffer is None:
+        # Text-only streams (redirect_stdout to a StringIO, IDLE, Jupyter) have no byte buffer
+        print(hierarchy_json.decode(), end='')
+    else:
+        # Write orjson's UTF-8 bytes straight to stdout, flushing pending text first so the output stays in order
+        sys.stdout.flush()
+        stdout_buffer.write(hierarchy_json)
 
 
 def display_ticket_details(ticket_details):
-    output = ""
+    # Collect the pieces and join once at the end; repeated += would copy the growing report for every line
+    parts = []
     for ticket in ticket_details:
-        output += f"Issue Key: {ticket['key']}\n"
-        output += f"Summary: {ticket['summary']}\n"
-        output += f"Description: {ticket['description']}\n"
-        output += f"Status: {ticket['status']}\n"
-        output += f"Acceptance Criteria: {ticket['acceptance_criteria']}\n"
+        parts.append(
+            f"Issue Key: {ticket['key']}\n"
+            f"Summary: {ticket['summary']}\n"
+            f"Description: {ticket['description']}\n"
+            f"Status: {ticket['status']}\n"
+            f"Acceptance Criteria: {ticket['acceptance_criteria']}\n"
+        )
         if ticket['comments']:
-            output += "Comments:\n"
-            for comment in ticket['comments']:
-                output += f"- {comment}\n"
-        output += "\n"
-    return output
+            parts.append("Comments:\n")
+            parts.extend(f"- {comment}\n" for comment in ticket['comments'])
+        parts.append("\n")
+    return "".join(parts)
 
 
 def main():
@@ -209,23 +633,34 @@ def main():
     email = input("Enter Jira email (username): ")  # Example: kiran.kumari@geminisolutions.com
     api_token = input("Enter Jira API token: ")
 
-    # Step 2: Validate Jira credentials
-    if not validate_jira_credentials(jira_base_url, email, api_token):
-        return
+    # Authenticate every request made through the shared session, encoding the Basic credentials once
+    SESSION.auth = PrecomputedBasicAuth(email, api_token)
 
-    # Step 3: Validate access to the given Jira ticket (epic link)
-    if not validate_jira_ticket_access(ticket_key, jira_base_url, email, api_token):
-        return
+    disk_cache = DiskCache.open(disk_cache_path())
+    try:
+        state = CrawlState(disk_cache=disk_cache)
 
-    # Step 4: Collecting ticket information recursively for the ticket, its linked issues, and its child tickets
-    ticket_details = collect_ticket_information(ticket_key, jira_base_url, email, api_token)
+        # Step 2: Validate Jira credentials and access to the given Jira ticket (epic link) with a single request
+        if not validate_jira_ticket_access(ticket_key, jira_base_url, state):
+            return
+
+        # Step 3: Collecting ticket information level by level for the ticket, its linked issues, and its child tickets
+        if '--async' in sys.argv[1:]:
+            # The asyncio crawler is optional because it needs aiohttp
+            from jira_async import collect_ticket_information_async
+            ticket_details = collect_ticket_information_async(ticket_key, jira_base_url, email, api_token, state)
+        else:
+            ticket_details = collect_ticket_information(ticket_key, jira_base_url, state)
+    finally:
+        if disk_cache is not None:
+            disk_cache.close()
 
     # Displaying all collected ticket details as a single string
     all_ticket_details = display_ticket_details(ticket_details)
     print(all_ticket_details)
 
     # Displaying the ticket hierarchy flowchart in JSON format (if needed)
-    display_ticket_hierarchy(ticket_hierarchy)
+    display_ticket_hierarchy(state.ticket_hierarchy)
 
 
 if __name__ == "__main__":